@@ -112,6 +112,11 @@ WSGI_APPLICATION = 'CBT_System.wsgi.application'
 # At the top or middle of settings.py
 AUTH_USER_MODEL = 'authentication.User'
 
+# Same checks as ModelBackend, but logins fetch only the columns they need
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.LoginBackend',
+]
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
@@ -122,6 +127,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "CBT_System.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
         "rest_framework.parsers.FormParser",
@@ -164,6 +173,21 @@ SIMPLE_JWT = {
 
 
 
+# Cache
+# Defaults to per-process local memory; set REDIS_URL (requires the redis
+# package) to share cached payloads between workers. Run more than one
+# gunicorn worker with REDIS_URL set: without it, cache invalidation stays
+# in the process that made the write, and cached exam payloads fall back
+# to a 60 second timeout (see Exam/caching.py).
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -193,6 +217,24 @@ else:
     }
 
 
+# Password hashing
+# Argon2 is used for new hashes; existing PBKDF2 hashes still verify and are
+# upgraded on the next login.
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Threads hashing passwords during a CSV user upload. Each Argon2 hash with
+# Django's default parameters holds about 100 MiB, so the upload peaks at
+# roughly CSV_HASH_WORKERS x 100 MiB inside the web worker.
+CSV_HASH_WORKERS = int(os.getenv("CSV_HASH_WORKERS", 2))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from authentication.models import User
+
+
+# Rendered exam payloads are invalidated explicitly (see signals.py), which
+# only reaches every process through a shared cache (REDIS_URL). With the
+# per-process local memory default, other gunicorn workers, or writes from
+# the shell/admin, can't bump this worker's versions, so the timeout is
+# what bounds how long a stale payload is served.
+_SHARED_CACHE = "locmem" not in settings.CACHES["default"]["BACKEND"].lower()
+EXAM_PAYLOAD_TIMEOUT = 60 * 60 if _SHARED_CACHE else 60
+
+# The students' available-exams list is also invalidated on every Exam
+# write; the short timeout is a safety net.
+AVAILABLE_EXAMS_TIMEOUT = 60
+
+
+def _exam_version_key(exam_id):
+    return f"exam:{exam_id}:version"
+
+
+def exam_payload_key(exam_id, hide_answers, host):
+    """
+    Cache key for the serialized exam tree. It embeds the exam's current
+    version, so bumping the version orphans every cached variant at once.
+    The host is part of the key because image URLs are absolute.
+    """
+    version = cache.get_or_set(_exam_version_key(exam_id), time.time_ns, None)
+    return f"exam:{exam_id}:v{version}:{int(bool(hide_answers))}:{host}"
+
+
+def invalidate_exam_payloads(exam_ids):
+    """
+    Bump the version of the given exams so their cached payloads are never
+    read again. The bump waits for the writing transaction to commit; done
+    earlier, a concurrent reader could re-cache the pre-commit data under
+    the new version.
+    """
+    keys = {_exam_version_key(exam_id) for exam_id in exam_ids}  # evaluated now, before the rows change
+    transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None))
+
+
+def available_exams_key(level):
+    return f"avail:{level or 'ALL'}"
+
+
+def invalidate_available_exams():
+    """Drop the cached available-exams list of every student level."""
+    levels = [level for level, _ in User.LEVEL_CHOICES] + [None]
+    keys = [available_exams_key(level) for level in levels]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['is_published', 'target_level', 'scheduled_date'], name='Exam_exam_is_publ_3c163a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'student'], name='Exam_examat_exam_id_663494_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['student', 'status'], name='Exam_examat_student_ed4370_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsection',
+            index=models.Index(fields=['exam', 'order'], name='Exam_examse_exam_id_4c47c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['attempt', 'section'], name='Exam_studen_attempt_8160f1_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_correct_option(apps, schema_editor):
+    Question = apps.get_model("Exam", "Question")
+    Option = apps.get_model("Exam", "Option")
+    correct = Option.objects.filter(question=OuterRef("pk"), is_correct=True).order_by("pk").values("pk")[:1]
+    Question.objects.update(correct_option=Subquery(correct))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0003_examattempt_refreshed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='correct_option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Exam.option'),
+        ),
+        migrations.RunPython(populate_correct_option, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:38
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def keep_one_correct_option(apps, schema_editor):
+    # Questions could have several correct options before the constraint;
+    # keep the lowest pk, the one 0004 copied into correct_option
+    Option = apps.get_model("Exam", "Option")
+    duplicated = (
+        Option.objects.filter(is_correct=True)
+        .values("question")
+        .annotate(first=Min("pk"), correct=Count("pk"))
+        .filter(correct__gt=1)
+    )
+    for row in duplicated:
+        Option.objects.filter(question=row["question"], is_correct=True).exclude(pk=row["first"]).update(is_correct=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0004_question_correct_option'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_one_correct_option, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='option',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_correct', True)), fields=('question',), name='uniq_correct_option_per_question'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0005_option_uniq_correct_option_per_question'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examattempt',
+            name='status',
+            field=models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('SUBMITTED', 'Submitted'), ('GRADED', 'Graded')], db_index=True, default='IN_PROGRESS', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='oscemark',
+            index=models.Index(condition=models.Q(('mark_gained__isnull', True)), fields=['attempt'], name='idx_ungraded_osce_marks'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(condition=models.Q(('mark_gained__isnull', True)), fields=['section'], name='idx_ungraded_answers'),
+        ),
+    ]
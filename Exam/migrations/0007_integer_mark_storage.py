@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+import Exam.fields
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+# (model, field) of the score columns moved from NUMERIC to integer hundredths
+MARK_FIELDS = [
+    ("StudentAnswer", "mark_gained"),
+    ("SectionScore", "score"),
+    ("ExamAttempt", "total_score"),
+]
+
+
+def to_hundredths(apps, schema_editor):
+    for model_name, name in MARK_FIELDS:
+        apps.get_model("Exam", model_name).objects.update(
+            **{f"{name}_hundredths": Cast(Round(F(name) * 100), models.BigIntegerField())}
+        )
+
+
+def from_hundredths(apps, schema_editor):
+    # done in Python, integer division in SQL would drop the fraction
+    for model_name, name in MARK_FIELDS:
+        model = apps.get_model("Exam", model_name)
+        rows = model.objects.exclude(**{f"{name}_hundredths": None}).only("pk", f"{name}_hundredths")
+        for row in rows:
+            setattr(row, name, Decimal(getattr(row, f"{name}_hundredths")).scaleb(-2))
+        model.objects.bulk_update(rows, [name], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0006_alter_examattempt_status_and_more'),
+    ]
+
+    operations = [
+        # the partial index is defined on mark_gained, drop it while the column is swapped
+        migrations.RemoveIndex(
+            model_name='studentanswer',
+            name='idx_ungraded_answers',
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='mark_gained_hundredths',
+            field=models.BigIntegerField(null=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='sectionscore',
+            name='score_hundredths',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='total_score_hundredths',
+            field=models.BigIntegerField(null=True, blank=True),
+        ),
+        migrations.RunPython(to_hundredths, from_hundredths),
+        migrations.RemoveField(model_name='studentanswer', name='mark_gained'),
+        migrations.RemoveField(model_name='sectionscore', name='score'),
+        migrations.RemoveField(model_name='examattempt', name='total_score'),
+        migrations.RenameField(model_name='studentanswer', old_name='mark_gained_hundredths', new_name='mark_gained'),
+        migrations.RenameField(model_name='sectionscore', old_name='score_hundredths', new_name='score'),
+        migrations.RenameField(model_name='examattempt', old_name='total_score_hundredths', new_name='total_score'),
+        # state only from here on: MarkField already maps to a bigint column
+        migrations.AlterField(
+            model_name='studentanswer',
+            name='mark_gained',
+            field=Exam.fields.MarkField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AlterField(
+            model_name='sectionscore',
+            name='score',
+            field=Exam.fields.MarkField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='examattempt',
+            name='total_score',
+            field=Exam.fields.MarkField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(condition=models.Q(('mark_gained__isnull', True)), fields=['section'], name='idx_ungraded_answers'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0007_integer_mark_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='examattempt',
+            name='Exam_examat_exam_id_663494_idx',
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'student', 'status'], name='Exam_examat_exam_id_1dcd19_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['student', '-started_at'], name='Exam_examat_student_196039_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['attempt', 'mark_gained'], name='Exam_studen_attempt_d3ea11_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-15 21:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0008_attempt_answer_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examattempt',
+            name='status',
+            field=models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('SUBMITTING', 'Submitting'), ('SUBMITTED', 'Submitted'), ('GRADED', 'Graded')], db_index=True, default='IN_PROGRESS', max_length=20),
+        ),
+    ]
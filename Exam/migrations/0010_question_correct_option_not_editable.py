@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-15 22:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Exam', '0009_examattempt_submitting_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='correct_option',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Exam.option'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from authentication.models import User
+from .fields import MarkField
 
 # ----- Questions & Options -----
 class Question(models.Model):
@@ -24,6 +25,10 @@ class Question(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="created_questions")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized copy of the option with is_correct=True, so auto-grading
+    # compares ids instead of scanning options.
+    correct_option = models.ForeignKey("Option", on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+")
+
     def __str__(self):
         return f"Q{self.pk} ({self.question_type})"
 
@@ -37,11 +42,22 @@ class Option(models.Model):
     # is_correct is optional because we may have single-correct scenario (we will also store correct reference).
     is_correct = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            # At most one correct option per question, enforced by a partial unique index
+            models.UniqueConstraint(
+                fields=["question"],
+                condition=models.Q(is_correct=True),
+                name="uniq_correct_option_per_question",
+            ),
+        ]
+
     def __str__(self):
         return f"Option {self.pk} for Q{self.question_id}"
 
 
-# If you'd rather keep a single correct FK in Question, you can, but here we support Option.is_correct as the source of truth.
+# Option.is_correct is the source of truth; Question.correct_option mirrors it
+# for grading and is re-derived on every Option save/delete (see signals.py).
 # ----- Exam structure -----
 class Exam(models.Model):
     title = models.CharField(max_length=255)
@@ -53,6 +69,12 @@ class Exam(models.Model):
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # student "available exams" listing
+            models.Index(fields=["is_published", "target_level", "scheduled_date"]),
+        ]
+
     def __str__(self):
         return f"{self.title} (id={self.pk})"
 
@@ -67,6 +89,11 @@ class ExamSection(models.Model):
 
     order = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["exam", "order"]),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.section_type})"
 
@@ -75,6 +102,8 @@ class ExamSection(models.Model):
 class ExamAttempt(models.Model):
     STATUS_CHOICES = [
         ("IN_PROGRESS", "In Progress"),
+        # submit() has claimed the attempt inside its grading transaction
+        ("SUBMITTING", "Submitting"),
         ("SUBMITTED", "Submitted"),
         ("GRADED", "Graded"),
     ]
@@ -82,8 +111,19 @@ class ExamAttempt(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="attempts")
     started_at = models.DateTimeField(auto_now_add=True)
     submitted_at = models.DateTimeField(blank=True, null=True)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="IN_PROGRESS")
-    total_score = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="IN_PROGRESS", db_index=True)
+    total_score = MarkField(max_digits=8, decimal_places=2, null=True, blank=True)
+    # When total_score/section_scores were last recomputed (on submit or grading)
+    refreshed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # the student's IN_PROGRESS attempt on an exam (start, questions, submit)
+            models.Index(fields=["exam", "student", "status"]),
+            models.Index(fields=["student", "status"]),
+            # my-attempts, newest first
+            models.Index(fields=["student", "-started_at"]),
+        ]
 
     def __str__(self):
         return f"Attempt {self.pk} by {self.student} on {self.exam}"
@@ -96,7 +136,7 @@ class StudentAnswer(models.Model):
     selected_option = models.ForeignKey(Option, on_delete=models.SET_NULL, null=True, blank=True)  # for objective                                                                                                                                                                                                                                                                                                                      
     essay_answer = models.TextField(blank=True, null=True)  # for theory
     # Examiner can set mark_gained
-    mark_gained = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    mark_gained = MarkField(max_digits=6, decimal_places=2, null=True, blank=True)
     graded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="graded_answers")
     graded_at = models.DateTimeField(null=True, blank=True)
 
@@ -104,6 +144,13 @@ class StudentAnswer(models.Model):
 
     class Meta:
         unique_together = ("attempt", "question")
+        indexes = [
+            models.Index(fields=["attempt", "section"]),
+            # graded/pending counts and totals of an attempt
+            models.Index(fields=["attempt", "mark_gained"]),
+            # examiner queue of answers still waiting for a mark
+            models.Index(fields=["section"], condition=models.Q(mark_gained__isnull=True), name="idx_ungraded_answers"),
+        ]
 
     def __str__(self):
         return f"Answer Q{self.question_id} by {self.attempt.student.username}"
@@ -119,6 +166,11 @@ class OSCEMark(models.Model):
     graded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="osce_graded")
     graded_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["attempt"], condition=models.Q(mark_gained__isnull=True), name="idx_ungraded_osce_marks"),
+        ]
+
     def __str__(self):
         return f"OSCEMark Q{self.osce_question_id} - {self.student.username}"
 
@@ -127,7 +179,7 @@ class OSCEMark(models.Model):
 class SectionScore(models.Model):
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name="section_scores")
     section = models.ForeignKey(ExamSection, on_delete=models.CASCADE)
-    score = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    score = MarkField(max_digits=8, decimal_places=2, default=0)
 
     class Meta:
         unique_together = ("attempt", "section")
@@ -1,10 +1,41 @@
+from collections.abc import Mapping
+
+from django.db import transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from authentication.models import User
+from .caching import invalidate_exam_payloads
 from .models import (
     Question, Option, Exam, ExamSection, ExamAttempt, StudentAnswer, SectionScore, OSCEMark
 )
 
-class OptionSerializer(serializers.ModelSerializer):
+def absolute_media_url(host, url):
+    """Prefix a media URL with an already resolved host ("scheme://host")."""
+    # Remote storages may already return absolute URLs
+    return host + url if url.startswith('/') else url
+
+
+class AbsoluteMediaURLMixin:
+    """
+    Build absolute media URLs by prefixing the request host, which is
+    resolved once per serializer instead of once per image.
+    """
+
+    @cached_property
+    def media_host(self):
+        request = self.context.get('request')
+        if request is None:
+            return None
+        return request.build_absolute_uri('/')[:-1]
+
+    def get_image_url(self, image_field):
+        if not image_field or self.media_host is None:
+            return None
+        return absolute_media_url(self.media_host, image_field.url)
+
+
+class OptionSerializer(AbsoluteMediaURLMixin, serializers.ModelSerializer):
     image_option = serializers.ImageField(
         required=False,
         allow_null=True,
@@ -18,13 +49,27 @@ class OptionSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "image_option_url")
     
     def get_image_option_url(self, obj):
-        request = self.context.get('request')
-        if obj.image_option and request:
-            return request.build_absolute_uri(obj.image_option.url)
-        return None
+        return self.get_image_url(obj.image_option)
+
+    def validate(self, data):
+        """
+        Report a second correct option as a validation error instead of
+        letting the uniq_correct_option_per_question constraint fail.
+        """
+        question = data.get('question', getattr(self.instance, 'question', None))
+        is_correct = data.get('is_correct', getattr(self.instance, 'is_correct', False))
+        if question is not None and is_correct:
+            others = Option.objects.filter(question=question, is_correct=True)
+            if self.instance is not None:
+                others = others.exclude(pk=self.instance.pk)
+            if others.exists():
+                raise serializers.ValidationError({
+                    "is_correct": "This question already has a correct option"
+                })
+        return data
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(AbsoluteMediaURLMixin, serializers.ModelSerializer):
     options = OptionSerializer(many=True, required=False, read_only=True)
     
     image_question = serializers.ImageField(
@@ -44,10 +89,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_by", "image_question_url")
     
     def get_image_question_url(self, obj):
-        request = self.context.get('request')
-        if obj.image_question and request:
-            return request.build_absolute_uri(obj.image_question.url)
-        return None
+        return self.get_image_url(obj.image_question)
 
     def create(self, validated_data):
         user = self.context["request"].user
@@ -55,8 +97,28 @@ class QuestionSerializer(serializers.ModelSerializer):
         return q
     
 
-class QuestionNestedSerializer(serializers.ModelSerializer):
-    options = serializers.SerializerMethodField()
+class OptionNestedSerializer(AbsoluteMediaURLMixin, serializers.ModelSerializer):
+    """Read-only option for nested exam payloads"""
+    image_option_url = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Option
+        fields = ("id", "text_option", "image_option_url", "is_correct")
+        read_only_fields = fields
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Only include is_correct for exam managers/examiners
+        if self.context.get('hide_answers', False):
+            fields.pop('is_correct')
+        return fields
+
+    def get_image_option_url(self, obj):
+        return self.get_image_url(obj.image_option)
+
+
+class QuestionNestedSerializer(AbsoluteMediaURLMixin, serializers.ModelSerializer):
+    options = OptionNestedSerializer(many=True, read_only=True)
     image_question_url = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -67,36 +129,14 @@ class QuestionNestedSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
     
-    def get_options(self, obj):
-        # Check if we should hide correct answers
-        hide_answers = self.context.get('hide_answers', False)
-        
-        if obj.question_type != Question.OBJECTIVE:
-            return []
-        
-        options = obj.options.all()
-        data = []
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
         
-        for opt in options:
-            option_data = {
-                'id': opt.id,
-                'text_option': opt.text_option,
-                'image_option_url': self.get_image_url(opt.image_option)
-            }
-            
-            # Only include is_correct for exam managers/examiners
-            if not hide_answers:
-                option_data['is_correct'] = opt.is_correct
-            
-            data.append(option_data)
+        # Only objective questions expose options
+        if instance.question_type != Question.OBJECTIVE:
+            representation['options'] = []
         
-        return data
-    
-    def get_image_url(self, image_field):
-        request = self.context.get('request')
-        if image_field and request:
-            return request.build_absolute_uri(image_field.url)
-        return None
+        return representation
     
     def get_image_question_url(self, obj):
         return self.get_image_url(obj.image_question)
@@ -136,8 +176,21 @@ class ExamSectionSerializer(serializers.ModelSerializer):
         return representation
 
 
+class ExamSectionReadSerializer(ExamSectionSerializer):
+    """Output-only section, nested in exam payloads"""
+    questions_ids = None
+
+    class Meta(ExamSectionSerializer.Meta):
+        fields = (
+            "id", "exam", "name", "section_type", 
+            "time_lapse_seconds", "questions", "order"
+        )
+        read_only_fields = fields
+
+
 class ExamSerializer(serializers.ModelSerializer):
-    sections = serializers.SerializerMethodField()
+    # hide_answers is read from the context set by the view
+    sections = ExamSectionReadSerializer(many=True, read_only=True)
 
     class Meta:
         model = Exam
@@ -147,29 +200,18 @@ class ExamSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("created_by",)
 
-    def get_sections(self, obj):
-        request = self.context.get('request')
-        user = request.user if request else None
-        
-        # Check if user is a student viewing available exams
-        hide_answers = user and user.is_student and not user.is_exam_manager
-        
-        sections = obj.sections.all()
-        serializer = ExamSectionSerializer(
-            sections, 
-            many=True, 
-            context={
-                'request': request,
-                'hide_answers': hide_answers
-            }
-        )
-        return serializer.data
-
     def create(self, validated_data):
         user = self.context["request"].user
         exam = Exam.objects.create(created_by=user, **validated_data)
         return exam
-    
+
+
+class ExamReadSerializer(ExamSerializer):
+    """Output-only exam for list/retrieve, skips building write-side field validation"""
+
+    class Meta(ExamSerializer.Meta):
+        read_only_fields = ExamSerializer.Meta.fields
+
 
 class StudentAnswerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -179,7 +221,8 @@ class StudentAnswerSerializer(serializers.ModelSerializer):
             "selected_option", "essay_answer", "mark_gained", 
             "graded_by", "graded_at"
         )
-        read_only_fields = ("graded_by", "graded_at", "mark_gained")
+        # only ever rendered, nested in ExamAttemptSerializer
+        read_only_fields = fields
 
 
 class ExamAttemptSerializer(serializers.ModelSerializer):
@@ -189,9 +232,10 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
         model = ExamAttempt
         fields = (
             "id", "exam", "student", "started_at", 
-            "submitted_at", "status", "total_score", "answers"
+            "submitted_at", "status", "total_score", "refreshed_at", "answers"
         )
-        read_only_fields = ("student", "started_at", "submitted_at", "status", "total_score")
+        # attempts are created and updated by the views, never from input
+        read_only_fields = fields
 
 
 
@@ -237,6 +281,63 @@ class ExamSubmissionSerializer(serializers.Serializer):
         return value
 
 
+# Parses ids with the same rules as the serializer's IntegerFields ("5", "5.0", 5.0)
+_SUBMISSION_INTEGER = serializers.IntegerField()
+
+
+def _submission_int(value, field, required=True):
+    if value is None:
+        if required:
+            raise serializers.ValidationError({field: ["This field is required."]})
+        return None
+    try:
+        return _SUBMISSION_INTEGER.to_internal_value(value)
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({field: exc.detail})
+
+
+def validate_submission(data):
+    """
+    Fast path of ExamSubmissionSerializer for submit(): checks the payload
+    in one pass instead of running a child serializer per answer, and
+    raises a ValidationError for the first bad field.
+    Returns (attempt_id, answers) with the same answer dicts as the
+    serializer's validated_data.
+    """
+    if not isinstance(data, Mapping):
+        raise serializers.ValidationError({
+            api_settings.NON_FIELD_ERRORS_KEY: [
+                f"Invalid data. Expected a dictionary, but got {type(data).__name__}."
+            ]
+        })
+    attempt_id = _submission_int(data.get('attempt_id'), 'attempt_id')
+    raw_answers = data.get('answers')
+    if not isinstance(raw_answers, list):
+        raise serializers.ValidationError({'answers': ["Expected a list of answers."]})
+    if not raw_answers:
+        raise serializers.ValidationError({'answers': ["At least one answer is required"]})
+    
+    answers = []
+    for index, raw in enumerate(raw_answers):
+        if not isinstance(raw, dict):
+            raise serializers.ValidationError({f'answers[{index}]': ["Expected an object."]})
+        answer = {
+            'section': _submission_int(raw.get('section'), f'answers[{index}].section'),
+            'question': _submission_int(raw.get('question'), f'answers[{index}].question'),
+        }
+        if 'selected_option' in raw:
+            answer['selected_option'] = _submission_int(
+                raw['selected_option'], f'answers[{index}].selected_option', required=False
+            )
+        if 'essay_answer' in raw:
+            essay = raw['essay_answer']
+            if essay is not None and (isinstance(essay, bool) or not isinstance(essay, (str, int, float))):
+                raise serializers.ValidationError({f'answers[{index}].essay_answer': ["Not a valid string."]})
+            answer['essay_answer'] = None if essay is None else str(essay).strip()
+        answers.append(answer)
+    return attempt_id, answers
+
+
 class ExamSubmissionResponseSerializer(serializers.Serializer):
     """Serializer for exam submission response"""
     detail = serializers.CharField()
@@ -283,7 +384,8 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
                     "options": "Objective questions must have at least 2 options"
                 })
             
-            # Check that exactly one option is marked as correct
+            # Check that exactly one option is marked as correct (the database
+            # also enforces at most one, this gives a readable error)
             correct_count = sum(1 for opt in options if opt.get('is_correct', False))
             if correct_count == 0:
                 raise serializers.ValidationError({
@@ -297,6 +399,59 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class QuestionUpdateSerializer(QuestionCreateSerializer):
+    """
+    Question entry for a section bulk update. Entries with an `id` keep that
+    existing question (updating its fields), entries without one are created.
+    """
+    id = serializers.IntegerField(required=False)
+    
+    class Meta(QuestionCreateSerializer.Meta):
+        fields = ("id",) + QuestionCreateSerializer.Meta.fields
+    
+    def validate(self, data):
+        if data.get('id') is None:
+            return super().validate(data)
+        
+        # Options of existing questions are edited through the options
+        # endpoint so that submitted answers keep their selected option
+        if 'options' in data:
+            raise serializers.ValidationError({
+                "options": f"Options of existing question {data['id']} cannot be replaced here"
+            })
+        return data
+
+
+def create_questions_with_options(questions_data, user):
+    """
+    Create questions and their options with one bulk INSERT per table,
+    then set each question's correct_option.
+    Returns the created questions (PKs are populated by bulk_create).
+    """
+    questions = []
+    options_data_per_question = []
+    for question_data in questions_data:
+        options_data_per_question.append(question_data.pop('options', []))
+        questions.append(Question(created_by=user, **question_data))
+    
+    Question.objects.bulk_create(questions, batch_size=500)
+    
+    options = [
+        Option(question=question, **option_data)
+        for question, options_data in zip(questions, options_data_per_question)
+        for option_data in options_data
+    ]
+    Option.objects.bulk_create(options, batch_size=500)
+    
+    # Mirror the correct option onto each question for grading
+    for option in options:
+        if option.is_correct:
+            option.question.correct_option = option
+    Question.objects.bulk_update(questions, ["correct_option"], batch_size=500)
+    
+    return questions
+
+
 class SectionBulkCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a complete section with questions and options"""
     questions = QuestionCreateSerializer(many=True, required=False)
@@ -320,6 +475,7 @@ class SectionBulkCreateSerializer(serializers.ModelSerializer):
         
         return data
     
+    @transaction.atomic
     def create(self, validated_data):
         questions_data = validated_data.pop('questions', [])
         
@@ -330,31 +486,45 @@ class SectionBulkCreateSerializer(serializers.ModelSerializer):
         section = ExamSection.objects.create(**validated_data)
         
         # Create questions and their options
-        for question_data in questions_data:
-            options_data = question_data.pop('options', [])
-            
-            # Create question
-            question = Question.objects.create(
-                created_by=user,
-                **question_data
-            )
-            
-            # Create options for the question
-            for option_data in options_data:
-                Option.objects.create(
-                    question=question,
-                    **option_data
-                )
-            
-            # Add question to section
-            section.questions.add(question)
+        questions = create_questions_with_options(questions_data, user)
+        
+        # Add all questions to section at once
+        section.questions.add(*questions)
         
         return section
 
 
+def update_questions(questions_data):
+    """
+    Apply field updates to existing questions. Each entry carries the
+    question `id`; plain fields are written with one bulk UPDATE.
+    """
+    question_ids = [q['id'] for q in questions_data]
+    questions = Question.objects.in_bulk(question_ids)
+    
+    update_fields = set()
+    for question_data in questions_data:
+        question = questions[question_data.pop('id')]
+        for field, value in question_data.items():
+            setattr(question, field, value)
+        
+        if 'image_question' in question_data:
+            # bulk_update doesn't run pre_save, which stores uploaded files
+            question.save(update_fields=list(question_data))
+        else:
+            update_fields.update(question_data)
+    
+    if update_fields:
+        Question.objects.bulk_update(questions.values(), list(update_fields), batch_size=500)
+        # bulk_update sends no post_save, invalidate every exam using these questions
+        invalidate_exam_payloads(
+            ExamSection.objects.filter(questions__in=question_ids).values_list('exam_id', flat=True)
+        )
+
+
 class SectionBulkUpdateSerializer(serializers.ModelSerializer):
-    """Serializer for updating a section with new questions and options"""
-    questions = QuestionCreateSerializer(many=True, required=False)
+    """Serializer for updating a section's questions and options"""
+    questions = QuestionUpdateSerializer(many=True, required=False)
     
     class Meta:
         model = ExamSection
@@ -373,10 +543,24 @@ class SectionBulkUpdateSerializer(serializers.ModelSerializer):
                                 f"but section type is '{section_type}'. They must match."
                 })
         
+        # Questions referenced by id must already belong to this section
+        kept_ids = [question['id'] for question in questions if question.get('id') is not None]
+        if kept_ids:
+            section_ids = set(self.instance.questions.filter(id__in=kept_ids).values_list('id', flat=True))
+            unknown_ids = [qid for qid in kept_ids if qid not in section_ids]
+            if unknown_ids:
+                raise serializers.ValidationError({
+                    'questions': f"Questions not in this section: {unknown_ids}"
+                })
+        
         return data
     
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update section and replace all questions"""
+        """
+        Update section and its questions: questions given by id are kept and
+        updated, new entries are created, and the rest are unlinked.
+        """
         questions_data = validated_data.pop('questions', [])
         user = self.context['request'].user
         
@@ -387,27 +571,23 @@ class SectionBulkUpdateSerializer(serializers.ModelSerializer):
         instance.order = validated_data.get('order', instance.order)
         instance.save()
         
-        # Clear existing questions
-        instance.questions.clear()
+        kept_data = [q for q in questions_data if q.get('id') is not None]
+        new_data = [q for q in questions_data if q.get('id') is None]
+        
+        # Unlink only the questions that are no longer listed
+        existing_ids = set(instance.questions.values_list('id', flat=True))
+        removed_ids = existing_ids - {q['id'] for q in kept_data}
+        if removed_ids:
+            instance.questions.remove(*removed_ids)
+        
+        if kept_data:
+            update_questions(kept_data)
         
         # Create new questions and their options
-        for question_data in questions_data:
-            options_data = question_data.pop('options', [])
-            
-            # Create question
-            question = Question.objects.create(
-                created_by=user,
-                **question_data
-            )
-            
-            # Create options for the question
-            for option_data in options_data:
-                Option.objects.create(
-                    question=question,
-                    **option_data
-                )
-            
-            # Add question to section
-            instance.questions.add(question)
+        questions = create_questions_with_options(new_data, user)
+        
+        # Add all new questions to section at once
+        if questions:
+            instance.questions.add(*questions)
         
         return instance
\ No newline at end of file
@@ -0,0 +1,75 @@
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .caching import invalidate_exam_payloads, invalidate_available_exams
+from .models import Exam, ExamSection, Question, Option
+
+
+# ----- Question.correct_option -----
+# Re-derived from Option.is_correct on every Option write, whichever code
+# path (API, admin, shell, fixtures) made it. Bulk writes bypass signals
+# and set it themselves (see create_questions_with_options).
+
+def _refresh_correct_options(questions):
+    correct = Option.objects.filter(question=OuterRef("pk"), is_correct=True).order_by("pk").values("pk")[:1]
+    questions.update(correct_option=Subquery(correct))
+
+
+@receiver(post_save, sender=Option)
+def option_saved(sender, instance, **kwargs):
+    # also the question the option was moved away from, if it was its correct one
+    _refresh_correct_options(
+        Question.objects.filter(Q(pk=instance.question_id) | Q(correct_option=instance.pk))
+    )
+
+
+@receiver(post_delete, sender=Option)
+def option_deleted(sender, instance, **kwargs):
+    _refresh_correct_options(Question.objects.filter(pk=instance.question_id))
+
+
+# ----- Exam payload cache invalidation -----
+# Any write to an exam, its sections, their questions or the questions'
+# options invalidates the cached payload of every exam involved.
+
+def _exam_ids_for_question(question_id):
+    return ExamSection.objects.filter(questions=question_id).values_list("exam_id", flat=True)
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, **kwargs):
+    invalidate_exam_payloads([instance.pk])
+    invalidate_available_exams()
+
+
+@receiver([post_save, post_delete], sender=ExamSection)
+def section_changed(sender, instance, **kwargs):
+    invalidate_exam_payloads([instance.exam_id])
+
+
+# pre_delete: the section links are gone by the time post_delete fires
+@receiver([post_save, pre_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_exam_payloads(_exam_ids_for_question(instance.pk))
+
+
+@receiver([post_save, pre_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    invalidate_exam_payloads(_exam_ids_for_question(instance.question_id))
+
+
+@receiver(m2m_changed, sender=ExamSection.questions.through)
+def section_questions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        # instance is the section
+        invalidate_exam_payloads([instance.exam_id])
+    elif action == "pre_clear":
+        # instance is the question, about to lose all its sections
+        invalidate_exam_payloads(_exam_ids_for_question(instance.pk))
+    else:
+        invalidate_exam_payloads(
+            ExamSection.objects.filter(pk__in=pk_set).values_list("exam_id", flat=True)
+        )
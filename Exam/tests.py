@@ -1,3 +1,282 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from .models import Exam, ExamAttempt, ExamSection, Option, Question, SectionScore, StudentAnswer
+
+
+def make_objective_question(maximum_mark="2.00", correct=0, options=2):
+    question = Question.objects.create(
+        question_type=Question.OBJECTIVE, text_question="q", maximum_mark=Decimal(maximum_mark)
+    )
+    for n in range(options):
+        Option.objects.create(question=question, text_option=f"o{n}", is_correct=n == correct)
+    question.refresh_from_db()
+    return question
+
+
+class MarkFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("stu", "pw", first_name="S", last_name="T", is_student=True)
+        cls.exam = Exam.objects.create(title="Marks")
+        cls.section = ExamSection.objects.create(exam=cls.exam, name="A", section_type=Question.OBJECTIVE)
+        cls.attempt = ExamAttempt.objects.create(exam=cls.exam, student=cls.student)
+
+    def test_round_trip(self):
+        for value in (None, Decimal("0"), Decimal("7.25"), Decimal("0.01"), Decimal("-3.50"), Decimal("123456.78")):
+            with self.subTest(value=value):
+                ExamAttempt.objects.filter(pk=self.attempt.pk).update(total_score=value)
+                self.attempt.refresh_from_db()
+                self.assertEqual(self.attempt.total_score, value)
+                if value is not None:
+                    self.assertIsInstance(self.attempt.total_score, Decimal)
+
+    def test_stored_as_integer_hundredths(self):
+        self.attempt.total_score = Decimal("7.25")
+        self.attempt.save()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT total_score FROM {ExamAttempt._meta.db_table} WHERE id = %s", [self.attempt.pk]
+            )
+            self.assertEqual(cursor.fetchone()[0], 725)
+
+    def test_filter_on_decimal_value(self):
+        ExamAttempt.objects.filter(pk=self.attempt.pk).update(total_score=Decimal("1.50"))
+        self.assertTrue(ExamAttempt.objects.filter(total_score=Decimal("1.5")).exists())
+        self.assertTrue(ExamAttempt.objects.filter(total_score__gt=Decimal("1.49")).exists())
+        self.assertFalse(ExamAttempt.objects.filter(total_score__gt=Decimal("1.50")).exists())
+
+    def test_sum(self):
+        for mark in (Decimal("1.25"), Decimal("2.50"), None):
+            StudentAnswer.objects.create(
+                attempt=self.attempt,
+                section=self.section,
+                question=make_objective_question(),
+                mark_gained=mark,
+            )
+        total = StudentAnswer.objects.filter(attempt=self.attempt).aggregate(total=Sum("mark_gained"))["total"]
+        self.assertEqual(total, Decimal("3.75"))
+        self.assertIsInstance(total, Decimal)
+
+    def test_sum_of_no_rows(self):
+        total = StudentAnswer.objects.filter(attempt=self.attempt).aggregate(total=Sum("mark_gained"))["total"]
+        self.assertIsNone(total)
+
+
+class MarkStorageMigrationTests(TransactionTestCase):
+    before = ("Exam", "0006_alter_examattempt_status_and_more")
+    after = ("Exam", "0007_integer_mark_storage")
+
+    def migrate(self, target):
+        return MigrationExecutor(connection).migrate([target]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes("Exam"))
+
+    def test_marks_survive_both_directions(self):
+        apps = self.migrate(self.before)
+        student = apps.get_model("authentication", "User").objects.create(username="stu", password="x")
+        exam = apps.get_model("Exam", "Exam").objects.create(title="Old")
+        section = apps.get_model("Exam", "ExamSection").objects.create(exam=exam, name="A", section_type="OBJECTIVE")
+        question = apps.get_model("Exam", "Question").objects.create(question_type="OBJECTIVE", maximum_mark=Decimal("2"))
+        attempt = apps.get_model("Exam", "ExamAttempt").objects.create(
+            exam=exam, student=student, total_score=Decimal("12.34")
+        )
+        apps.get_model("Exam", "StudentAnswer").objects.create(
+            attempt=attempt, section=section, question=question, mark_gained=Decimal("1.25")
+        )
+        apps.get_model("Exam", "SectionScore").objects.create(attempt=attempt, section=section, score=Decimal("7.50"))
+
+        for target in (self.after, self.before):
+            with self.subTest(target=target):
+                apps = self.migrate(target)
+                self.assertEqual(apps.get_model("Exam", "ExamAttempt").objects.get().total_score, Decimal("12.34"))
+                self.assertEqual(apps.get_model("Exam", "StudentAnswer").objects.get().mark_gained, Decimal("1.25"))
+                self.assertEqual(apps.get_model("Exam", "SectionScore").objects.get().score, Decimal("7.50"))
+
+
+class CorrectOptionTests(TestCase):
+    def test_follows_the_option_marked_correct(self):
+        question = make_objective_question(correct=1)
+        self.assertEqual(question.correct_option, question.options.get(is_correct=True))
+
+        first = question.options.get(text_option="o0")
+        second = question.options.get(text_option="o1")
+        second.is_correct = False
+        second.save()
+        question.refresh_from_db()
+        self.assertIsNone(question.correct_option_id)
+
+        first.is_correct = True
+        first.save()
+        question.refresh_from_db()
+        self.assertEqual(question.correct_option_id, first.pk)
+
+    def test_option_moved_to_another_question(self):
+        source = make_objective_question(correct=0)
+        target = make_objective_question(correct=None)
+        option = source.options.get(is_correct=True)
+
+        option.question = target
+        option.save()
+        source.refresh_from_db()
+        target.refresh_from_db()
+        self.assertIsNone(source.correct_option_id)
+        self.assertEqual(target.correct_option_id, option.pk)
+
+    def test_option_deleted(self):
+        question = make_objective_question(correct=0)
+        question.correct_option.delete()
+        question.refresh_from_db()
+        self.assertIsNone(question.correct_option_id)
+
+    def test_wrong_option_deleted(self):
+        question = make_objective_question(correct=0)
+        correct_id = question.correct_option_id
+        question.options.filter(is_correct=False).delete()
+        question.refresh_from_db()
+        self.assertEqual(question.correct_option_id, correct_id)
+
+    def test_not_editable_through_the_api(self):
+        manager = User.objects.create_user("mgr", "pw", first_name="M", last_name="G", is_exam_manager=True, is_staff=True)
+        client = APIClient()
+        client.force_authenticate(manager)
+        question = make_objective_question(correct=0)
+        wrong = question.options.get(is_correct=False)
+
+        response = client.patch(
+            f"/api/cbt/questions/{question.pk}/", {"correct_option": wrong.pk}, format="json"
+        )
+        self.assertLess(response.status_code, 500)
+        question.refresh_from_db()
+        self.assertEqual(question.correct_option, question.options.get(is_correct=True))
+
+
+class SubmitTests(TestCase):
+    url = "/api/cbt/student-exams/submit/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("stu", "pw", first_name="S", last_name="T", is_student=True)
+        cls.exam = Exam.objects.create(title="Submit", is_published=True)
+        cls.objective = ExamSection.objects.create(exam=cls.exam, name="A", section_type=Question.OBJECTIVE, order=1)
+        cls.theory = ExamSection.objects.create(exam=cls.exam, name="B", section_type=Question.THEORY, order=2)
+        cls.q1 = make_objective_question("2.00")
+        cls.q2 = make_objective_question("1.50")
+        cls.essay = Question.objects.create(question_type=Question.THEORY, text_question="essay", maximum_mark=10)
+        cls.objective.questions.add(cls.q1, cls.q2)
+        cls.theory.questions.add(cls.essay)
+
+    def setUp(self):
+        self.attempt = ExamAttempt.objects.create(exam=self.exam, student=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def payload(self, q2_option=None):
+        if q2_option is None:
+            q2_option = self.q2.options.get(is_correct=False).pk
+        return {
+            "attempt_id": self.attempt.pk,
+            "answers": [
+                {"section": self.objective.pk, "question": self.q1.pk, "selected_option": self.q1.correct_option_id},
+                {"section": self.objective.pk, "question": self.q2.pk, "selected_option": q2_option},
+                {"section": self.theory.pk, "question": self.essay.pk, "essay_answer": "  my essay  "},
+            ],
+        }
+
+    def test_grades_objective_answers_and_leaves_theory_pending(self):
+        response = self.client.post(self.url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["total_score"], 2.0)
+        self.assertEqual(response.data["graded_questions"], 2)
+        self.assertEqual(response.data["pending_grading"], 1)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "SUBMITTED")
+        self.assertEqual(self.attempt.total_score, Decimal("2.00"))
+        self.assertIsNotNone(self.attempt.submitted_at)
+        marks = dict(self.attempt.answers.values_list("question", "mark_gained"))
+        self.assertEqual(marks, {self.q1.pk: Decimal("2.00"), self.q2.pk: Decimal("0"), self.essay.pk: None})
+        self.assertEqual(self.attempt.answers.get(question=self.essay).essay_answer, "my essay")
+        scores = dict(self.attempt.section_scores.values_list("section", "score"))
+        self.assertEqual(scores, {self.objective.pk: Decimal("2.00"), self.theory.pk: Decimal("0")})
+
+    def test_all_correct(self):
+        response = self.client.post(self.url, self.payload(self.q2.correct_option_id), format="json")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["total_score"], 3.5)
+
+    def test_submitting_twice(self):
+        self.assertEqual(self.client.post(self.url, self.payload(), format="json").status_code, 200)
+
+        response = self.client.post(self.url, self.payload(), format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_unanswered_question(self):
+        payload = self.payload()
+        del payload["answers"][1]
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["missing_question_ids"], [self.q2.pk])
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "IN_PROGRESS")
+
+    def test_option_of_another_question(self):
+        response = self.client.post(self.url, self.payload(self.q1.correct_option_id), format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.attempt.answers.exists())
+
+    def test_malformed_ids(self):
+        payload = self.payload()
+        payload["attempt_id"] = "one"
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("attempt_id", response.data)
+
+    def test_lost_claim(self):
+        table = ExamAttempt._meta.db_table
+
+        def submitted_meanwhile(execute, sql, params, many, context):
+            # another request claims and submits the attempt between this
+            # one's validation and its claim
+            if sql.startswith(f'UPDATE "{table}"') and "SUBMITTING" in params:
+                execute(f'UPDATE "{table}" SET "status" = %s WHERE "id" = %s', ("SUBMITTED", self.attempt.pk), False, context)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(submitted_meanwhile):
+            response = self.client.post(self.url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 409)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "SUBMITTED")
+        self.assertFalse(self.attempt.answers.exists())
+        self.assertFalse(self.attempt.section_scores.exists())
+
+    def test_error_rolls_back_the_claim(self):
+        with mock.patch.object(SectionScore.objects, "bulk_create", side_effect=RuntimeError("disk full")):
+            response = self.client.post(self.url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("disk full", response.data["detail"])
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "IN_PROGRESS")
+        self.assertFalse(self.attempt.answers.exists())
+
+        # the student can submit again
+        response = self.client.post(self.url, self.payload(), format="json")
+        self.assertEqual(response.status_code, 200, response.data)
@@ -1,20 +1,33 @@
 import csv
 import io
+from collections import defaultdict
+from itertools import islice
 
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Sum, Q
+from django.db.models import Count, Sum, Q, Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import serializers, viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.parsers import MultiPartParser, JSONParser, FormParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 
-from authentication.models import User
+from authentication.models import User, full_name
 from authentication.permissions import IsAdmin, IsExamManager, IsExaminer
+from .caching import (
+    exam_payload_key,
+    available_exams_key,
+    EXAM_PAYLOAD_TIMEOUT,
+    AVAILABLE_EXAMS_TIMEOUT,
+)
+from CBT_System.renderers import CSVRenderer, Echo
 from .models import (
     Exam, 
     ExamSection, 
@@ -26,18 +39,71 @@ from .models import (
 )
 from .serializers import (
     QuestionSerializer,
+    QuestionNestedSerializer,
     OptionSerializer,
     ExamSerializer,
+    ExamReadSerializer,
     ExamSectionSerializer,
     ExamAttemptSerializer,
     StudentAnswerSerializer,
     ExamSubmissionSerializer,
     ExamSubmissionResponseSerializer,
     SectionBulkCreateSerializer,
-    SectionBulkUpdateSerializer
+    SectionBulkUpdateSerializer,
+    absolute_media_url,
+    validate_submission,
+)
+
+
+# Prefetch for serializing exam -> sections -> questions -> options,
+# fetching only the columns QuestionNestedSerializer reads
+EXAM_TREE_PREFETCH = (
+    Prefetch(
+        "sections__questions",
+        queryset=Question.objects.only(
+            "id", "question_type", "text_question", "image_question", "maximum_mark"
+        ),
+    ),
+    Prefetch(
+        "sections__questions__options",
+        queryset=Option.objects.only(
+            "id", "question_id", "text_option", "image_option", "is_correct"
+        ),
+    ),
+)
+
+# ExamAttempt values() columns behind each results-table row
+RESULT_ROW_FIELDS = (
+    "id", "total_score", "student__username", "student__first_name",
+    "student__middle_name", "student__last_name", "student__level",
 )
 
 
+def _student_full_name(row):
+    """User.get_full_name() for a RESULT_ROW_FIELDS row."""
+    return full_name(row["student__first_name"], row["student__middle_name"], row["student__last_name"])
+
+
+class HideAnswersMixin:
+    """
+    Decide once per request whether correct answers must be hidden
+    (students who are not exam managers) and pass it to the serializers
+    as context["hide_answers"].
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        request._hide_answers = bool(
+            getattr(user, "is_student", False) and not getattr(user, "is_exam_manager", False)
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["hide_answers"] = getattr(self.request, "_hide_answers", False)
+        return context
+
+
 # ---- Questions / Options / Exams / Sections (Exam Managers) ----
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all().prefetch_related("options")
@@ -65,41 +131,124 @@ class OptionViewSet(viewsets.ModelViewSet):
 
 
 
-class ExamViewSet(viewsets.ModelViewSet):
-    queryset = Exam.objects.all().prefetch_related("sections")
+class ExamViewSet(HideAnswersMixin, viewsets.ModelViewSet):
+    queryset = Exam.objects.all().prefetch_related(*EXAM_TREE_PREFETCH)
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated, IsExamManager]
 
-    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated, IsExamManager], url_path="results-table")
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return ExamReadSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        if self.action == "results_table":
+            # The results table only reads the exam's own fields
+            return Exam.objects.all()
+        return super().get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        # The nested payload only changes when the exam tree is edited, and
+        # those writes invalidate it (see Exam/signals.py)
+        # Keyed on the integer pk the signals invalidate, so "/exams/01/" is not a separate entry
+        try:
+            exam_id = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        key = exam_payload_key(exam_id, request._hide_answers, request.get_host())
+        data = cache.get_or_set(
+            key,
+            lambda: dict(self.get_serializer(self.get_object()).data),
+            EXAM_PAYLOAD_TIMEOUT
+        )
+        return Response(data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("format", OpenApiTypes.STR, enum=["json", "csv"], description="csv streams the table as a CSV download"),
+        ],
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, IsExamManager],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer],
+        url_path="results-table",
+    )
     def results_table(self, request, pk=None):
         """
         Returns results for all students for this exam:
         name, reg number (username), level, exam id, exam title, exam date, score for each section, and total score.
+        With ?format=csv the same table is streamed as CSV.
         """
         exam = self.get_object()
-        attempts = exam.attempts.select_related("student").prefetch_related("section_scores__section")
-        results = []
         sections = list(exam.sections.order_by("order"))
-        for attempt in attempts:
-            # build per-section scores dict
-            per_section = {s.id: 0 for s in sections}
-            section_scores = attempt.section_scores.all()
-            for ss in section_scores:
-                per_section[ss.section.id] = float(ss.score)
-            total = float(attempt.total_score or 0)
-            row = {
-                "student_name": attempt.student.get_full_name(),
-                "reg_number": attempt.student.username,
-                "level": attempt.student.level,
+        if request.accepted_renderer.format == "csv":
+            return self._stream_results_csv(exam, sections)
+        
+        # Plain rows instead of model instances: one query for the attempts
+        # with their students, one for every section score of the exam
+        attempt_rows = exam.attempts.values(*RESULT_ROW_FIELDS)
+        scores_by_attempt = defaultdict(dict)
+        for attempt_id, section_id, score in SectionScore.objects.filter(
+            attempt__exam=exam
+        ).values_list("attempt_id", "section_id", "score"):
+            scores_by_attempt[attempt_id][section_id] = float(score)
+        
+        results = []
+        for row in attempt_rows:
+            per_section = scores_by_attempt[row["id"]]
+            results.append({
+                "student_name": _student_full_name(row),
+                "reg_number": row["student__username"],
+                "level": row["student__level"],
                 "exam_id": exam.id,
                 "exam_title": exam.title,
                 "exam_date": exam.scheduled_date,
                 "per_section_scores": {s.name: per_section.get(s.id, 0) for s in sections},
-                "total_score": total,
-            }
-            results.append(row)
+                "total_score": float(row["total_score"] or 0),
+            })
         return Response({"results": results})
 
+    def _stream_results_csv(self, exam, sections):
+        """
+        Stream the results table as CSV, reading attempt rows from the
+        database in chunks with one section score query per chunk.
+        """
+        attempt_rows = exam.attempts.order_by("pk").values(*RESULT_ROW_FIELDS).iterator(chunk_size=500)
+        writer = csv.writer(Echo())
+        
+        def rows():
+            yield writer.writerow(
+                ["student_name", "reg_number", "level", "exam_id", "exam_title", "exam_date"]
+                + [s.name for s in sections]
+                + ["total_score"]
+            )
+            while chunk := list(islice(attempt_rows, 500)):
+                scores_by_attempt = defaultdict(dict)
+                for attempt_id, section_id, score in SectionScore.objects.filter(
+                    attempt_id__in=[row["id"] for row in chunk]
+                ).values_list("attempt_id", "section_id", "score"):
+                    scores_by_attempt[attempt_id][section_id] = float(score)
+                for row in chunk:
+                    per_section = scores_by_attempt[row["id"]]
+                    yield writer.writerow(
+                        [
+                            _student_full_name(row),
+                            row["student__username"],
+                            row["student__level"],
+                            exam.id,
+                            exam.title,
+                            exam.scheduled_date,
+                        ]
+                        + [per_section.get(s.id, 0) for s in sections]
+                        + [float(row["total_score"] or 0)]
+                    )
+        
+        response = StreamingHttpResponse(rows(), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="exam-{exam.id}-results.csv"'
+        return response
+
 
 class ExamSectionViewSet(viewsets.ModelViewSet):
     queryset = ExamSection.objects.all().prefetch_related("questions")
@@ -107,6 +256,43 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsExamManager]
     parser_classes = (JSONParser, MultiPartParser, FormParser)
 
+    def get_queryset(self):
+        if self.action == "list_questions":
+            # Questions are paged by the action itself, don't prefetch them all
+            return ExamSection.objects.all()
+        return super().get_queryset()
+
+    @extend_schema(
+        summary="Page through a section's questions",
+        parameters=[
+            OpenApiParameter("page", OpenApiTypes.INT, description="Page number (default 1)"),
+            OpenApiParameter("page_size", OpenApiTypes.INT, description="Questions per page (default 20, max 100)"),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=True, methods=["get"], url_path="questions")
+    def list_questions(self, request, pk=None):
+        """
+        Return one page of a section's questions with their options.
+        URL: GET /api/cbt/sections/{section_id}/questions/?page=1&page_size=20
+        """
+        section = self.get_object()
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), 100)
+        except ValueError:
+            return Response({"detail": "page_size must be an integer"}, status=400)
+        
+        questions = section.questions.order_by("pk").prefetch_related("options")
+        page = Paginator(questions, page_size).get_page(request.query_params.get("page"))
+        
+        serializer = QuestionNestedSerializer(page.object_list, many=True, context=self.get_serializer_context())
+        return Response({
+            "count": page.paginator.count,
+            "num_pages": page.paginator.num_pages,
+            "page": page.number,
+            "results": serializer.data
+        })
+
     @action(detail=True, methods=["post"], url_path="add-questions")
     def add_questions(self, request, pk=None):
         """
@@ -120,16 +306,15 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
             return Response({"detail": "question_ids list is required"}, status=400)
         
         # Validate all questions exist
-        questions = Question.objects.filter(id__in=question_ids)
-        if questions.count() != len(question_ids):
-            found_ids = list(questions.values_list('id', flat=True))
-            missing_ids = [qid for qid in question_ids if qid not in found_ids]
+        question_ids = self._question_id_list(question_ids)
+        missing_ids = self._missing_question_ids(question_ids)
+        if missing_ids:
             return Response({
                 "detail": f"Questions not found: {missing_ids}"
             }, status=400)
         
-        # Add questions to section
-        section.questions.add(*questions)
+        # Add questions to section, the manager only needs their ids
+        section.questions.add(*question_ids)
         
         serializer = self.get_serializer(section)
         return Response({
@@ -166,21 +351,16 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
         section = self.get_object()
         question_ids = request.data.get("question_ids", [])
         
-        # Clear existing questions
-        section.questions.clear()
+        # Validate all questions exist before touching the section
+        question_ids = self._question_id_list(question_ids)
+        missing_ids = self._missing_question_ids(question_ids)
+        if missing_ids:
+            return Response({
+                "detail": f"Questions not found: {missing_ids}"
+            }, status=400)
         
-        if question_ids:
-            # Validate all questions exist
-            questions = Question.objects.filter(id__in=question_ids)
-            if questions.count() != len(question_ids):
-                found_ids = list(questions.values_list('id', flat=True))
-                missing_ids = [qid for qid in question_ids if qid not in found_ids]
-                return Response({
-                    "detail": f"Questions not found: {missing_ids}"
-                }, status=400)
-            
-            # Set new questions
-            section.questions.set(questions)
+        # Replace the questions; set() only adds/removes the difference
+        section.questions.set(question_ids)
         
         serializer = self.get_serializer(section)
         return Response({
@@ -188,6 +368,21 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
             "section": serializer.data
         })
     
+    @staticmethod
+    def _question_id_list(question_ids):
+        """question_ids parsed like IntegerFields ("2" -> 2); anything else is a 400."""
+        field = serializers.ListField(child=serializers.IntegerField())
+        try:
+            return field.run_validation(question_ids)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"question_ids": exc.detail})
+    
+    @staticmethod
+    def _missing_question_ids(question_ids):
+        """Ids from question_ids that match no Question, checked without loading the rows."""
+        found_ids = set(Question.objects.filter(id__in=question_ids).values_list('id', flat=True))
+        return [qid for qid in question_ids if qid not in found_ids]
+    
     def get_serializer_class(self):
         """
         Return different serializers for different actions
@@ -250,13 +445,14 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
     
     @extend_schema(
-        summary="Replace all questions in a section",
+        summary="Update the questions in a section",
         description="""
-        Replace all existing questions in a section with new ones.
+        Update a section's question list in one request.
         
         **Important Notes:**
-        - Existing questions will be unlinked from the section (but not deleted from database)
-        - New questions will be created with new IDs
+        - Questions given with an `id` (already in this section) are kept and their fields updated; their options cannot be replaced here
+        - Questions given without an `id` are created with their options
+        - Existing questions not listed will be unlinked from the section (but not deleted from database)
         - You don't need to provide the 'exam' field (section already belongs to an exam)
         - You can update section metadata (name, time_lapse_seconds, etc.) in the same request
         """,
@@ -275,6 +471,12 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
                     "time_lapse_seconds": 5400,
                     "order": 1,
                     "questions": [
+                        {
+                            "id": 12,
+                            "question_type": "OBJECTIVE",
+                            "text_question": "What is Python?",
+                            "maximum_mark": "2.00"
+                        },
                         {
                             "question_type": "OBJECTIVE",
                             "text_question": "What is Django?",
@@ -303,7 +505,7 @@ class ExamSectionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["put"], url_path="bulk-update")
     def bulk_update(self, request, pk=None):
         """
-        Replace all questions in an existing section.
+        Update the questions of an existing section.
         URL: PUT /api/cbt/sections/{section_id}/bulk-update/
         """
         section = self.get_object()
@@ -328,15 +530,25 @@ class StudentExamViewSet(viewsets.GenericViewSet):
     serializer_class = ExamSerializer
     queryset = Exam.objects.none()
 
+    @extend_schema(
+        summary="List available exams",
+        description="Published exams for the student's level. Questions are served by the questions endpoint once an attempt is started.",
+        responses={200: OpenApiTypes.OBJECT},
+    )
     @action(detail=False, methods=["get"])
     def available(self, request):
         """List available exams for the student"""
         user = request.user
-        qs = Exam.objects.filter(is_published=True).filter(
-            Q(target_level=user.level) | Q(target_level__isnull=True)
-        )
-        serializer = ExamSerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        
+        def available_exams():
+            qs = Exam.objects.filter(is_published=True).filter(
+                Q(target_level=user.level) | Q(target_level__isnull=True)
+            )
+            return list(qs.values("id", "title", "description", "scheduled_date", "target_level", "is_published"))
+        
+        # Same list for every student of a level, invalidated on Exam writes (see Exam/signals.py)
+        data = cache.get_or_set(available_exams_key(user.level), available_exams, AVAILABLE_EXAMS_TIMEOUT)
+        return Response(data)
 
     @extend_schema(
         summary="Start an exam attempt",
@@ -384,58 +596,79 @@ class StudentExamViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=["get"], url_path="questions")
     def get_exam_questions(self, request, pk=None):
         """Get all questions for an exam (for taking the exam)"""
-        try:
-            exam = Exam.objects.prefetch_related(
-                'sections__questions__options'
-            ).get(pk=pk, is_published=True)
-        except Exam.DoesNotExist:
+        exam = Exam.objects.filter(pk=pk, is_published=True).values('id', 'title').first()
+        if exam is None:
             return Response({"detail": "Exam not found"}, status=404)
         
-        attempt = ExamAttempt.objects.filter(
-            exam=exam, 
+        attempt_id = ExamAttempt.objects.filter(
+            exam_id=exam['id'], 
             student=request.user, 
             status="IN_PROGRESS"
-        ).first()
+        ).values_list('id', flat=True).first()
         
-        if not attempt:
+        if not attempt_id:
             return Response({"detail": "No active attempt found. Start exam first."}, status=400)
         
+        # Plain rows from one query per table, grouped in Python; no model
+        # instances are built for the (possibly large) question tree
+        sections = ExamSection.objects.filter(exam_id=exam['id']).order_by('order').values(
+            'id', 'name', 'section_type', 'time_lapse_seconds'
+        )
+        question_rows = Question.objects.filter(sections__exam_id=exam['id']).order_by('id').values(
+            'id', 'sections', 'question_type', 'text_question', 'image_question', 'maximum_mark'
+        )
+        questions_by_section = defaultdict(list)
+        for row in question_rows:
+            questions_by_section[row['sections']].append(row)
+        
+        objective_ids = {
+            row['id'] for rows in questions_by_section.values() for row in rows
+            if row['question_type'] == Question.OBJECTIVE
+        }
+        options_by_question = defaultdict(list)
+        for row in Option.objects.filter(question_id__in=objective_ids).order_by('id').values(
+            'id', 'question_id', 'text_option', 'image_option'
+        ):
+            options_by_question[row['question_id']].append(row)
+        
+        # Resolve the host once instead of once per image
+        media_host = request.build_absolute_uri('/')[:-1]
+        question_images = Question._meta.get_field('image_question').storage
+        option_images = Option._meta.get_field('image_option').storage
+        
+        def image_url(storage, name):
+            return absolute_media_url(media_host, storage.url(name)) if name else None
+        
         sections_data = []
-        for section in exam.sections.all().order_by('order'):
+        for section in sections:
             questions_data = []
-            for question in section.questions.all():
+            for question in questions_by_section[section['id']]:
                 q_data = {
-                    'id': question.id,
-                    'question_type': question.question_type,
-                    'text_question': question.text_question,
-                    'image_question': request.build_absolute_uri(question.image_question.url) if question.image_question else None,
-                    'maximum_mark': float(question.maximum_mark),
+                    'id': question['id'],
+                    'question_type': question['question_type'],
+                    'text_question': question['text_question'],
+                    'image_question': image_url(question_images, question['image_question']),
+                    'maximum_mark': float(question['maximum_mark']),
                 }
                 
-                if question.question_type == Question.OBJECTIVE:
+                if question['question_type'] == Question.OBJECTIVE:
                     q_data['options'] = [
                         {
-                            'id': opt.id,
-                            'text_option': opt.text_option,
-                            'image_option': request.build_absolute_uri(opt.image_option.url) if opt.image_option else None,
+                            'id': opt['id'],
+                            'text_option': opt['text_option'],
+                            'image_option': image_url(option_images, opt['image_option']),
                         }
-                        for opt in question.options.all()
+                        for opt in options_by_question[question['id']]
                     ]
                 
                 questions_data.append(q_data)
             
-            sections_data.append({
-                'id': section.id,
-                'name': section.name,
-                'section_type': section.section_type,
-                'time_lapse_seconds': section.time_lapse_seconds,
-                'questions': questions_data
-            })
+            sections_data.append({**section, 'questions': questions_data})
         
         return Response({
-            'exam_id': exam.id,
-            'exam_title': exam.title,
-            'attempt_id': attempt.id,
+            'exam_id': exam['id'],
+            'exam_title': exam['title'],
+            'attempt_id': attempt_id,
             'sections': sections_data
         })
 
@@ -482,160 +715,191 @@ class StudentExamViewSet(viewsets.GenericViewSet):
         Submit an exam attempt
         URL: POST /api/cbt/student-exams/submit/
         """
-        # Validate input using serializer
-        serializer = ExamSubmissionSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        # Validate input in one pass (ExamSubmissionSerializer documents the shape)
+        attempt_id, answers = validate_submission(request.data)
         
-        attempt_id = serializer.validated_data['attempt_id']
-        answers = serializer.validated_data['answers']
+        # Load what grading needs with one query each: the referenced
+        # questions and the question id of every selected option
+        questions_map = Question.objects.only(
+            'id', 'question_type', 'maximum_mark', 'correct_option'
+        ).in_bulk({a['question'] for a in answers})
+        option_questions = dict(
+            Option.objects.filter(
+                pk__in={a['selected_option'] for a in answers if a.get('selected_option')}
+            ).values_list('id', 'question_id')
+        )
         
         try:
-            with transaction.atomic():
-                # Lock the attempt to prevent concurrent submissions
-                attempt = ExamAttempt.objects.select_for_update().select_related('exam').get(
-                    pk=attempt_id,
-                    student=request.user,
-                    status="IN_PROGRESS"
-                )
-                
-                # Validate all questions are answered
-                all_sections = attempt.exam.sections.prefetch_related('questions').all()
-                all_question_ids = set()
-                for section in all_sections:
-                    all_question_ids.update(section.questions.values_list('id', flat=True))
-                
-                if not all_question_ids:
-                    return Response({"detail": "This exam has no questions"}, status=400)
-                
-                submitted_question_ids = {a['question'] for a in answers}
-                missing_questions = all_question_ids - submitted_question_ids
-                
-                if missing_questions:
-                    return Response({
-                        "detail": "Not all questions have been answered",
-                        "missing_question_ids": list(missing_questions)
-                    }, status=400)
-                
-                # Pre-fetch all questions and sections to avoid N+1 queries
-                question_ids = list(submitted_question_ids)
-                section_ids = list({a['section'] for a in answers})
-                
-                questions_map = {q.id: q for q in Question.objects.prefetch_related('options').filter(id__in=question_ids)}
-                sections_map = {s.id: s for s in ExamSection.objects.prefetch_related('questions').filter(id__in=section_ids)}
-                
-                # Validate sections belong to exam
-                for section in sections_map.values():
-                    if section.exam_id != attempt.exam_id:
-                        return Response({
-                            "detail": f"Section {section.id} does not belong to this exam"
-                        }, status=400)
-                
-                # Process each answer
-                for a in answers:
-                    section_id = a['section']
-                    qid = a['question']
-                    selected_option_id = a.get('selected_option')
-                    essay_answer = a.get('essay_answer', '').strip()
-                    
-                    question = questions_map.get(qid)
-                    section = sections_map.get(section_id)
-                    
-                    if not question:
-                        return Response({"detail": f"Question {qid} not found"}, status=400)
-                    if not section:
-                        return Response({"detail": f"Section {section_id} not found"}, status=400)
-                    
-                    # Validate question belongs to section
-                    if not section.questions.filter(pk=question.pk).exists():
+            # Only the ids and the exam title are read; the attempt's own
+            # columns are written with update() below
+            attempt = ExamAttempt.objects.select_related('exam').only('id', 'exam', 'exam__title').get(
+                pk=attempt_id,
+                student=request.user,
+                status="IN_PROGRESS"
+            )
+        except ExamAttempt.DoesNotExist:
+            return Response({"detail": "Attempt not found or already submitted"}, status=404)
+        
+        # Section -> question ids of this exam in one LEFT JOIN query (empty
+        # sections come back with a None question), checked in memory below
+        section_questions = {}
+        for section_id, question_id in ExamSection.objects.filter(
+            exam_id=attempt.exam_id
+        ).values_list('id', 'questions'):
+            question_ids = section_questions.setdefault(section_id, set())
+            if question_id is not None:
+                question_ids.add(question_id)
+        
+        # Validate all questions are answered
+        all_question_ids = set().union(*section_questions.values())
+        
+        if not all_question_ids:
+            return Response({"detail": "This exam has no questions"}, status=400)
+        
+        submitted_question_ids = {a['question'] for a in answers}
+        missing_questions = all_question_ids - submitted_question_ids
+        
+        if missing_questions:
+            return Response({
+                "detail": "Not all questions have been answered",
+                "missing_question_ids": list(missing_questions)
+            }, status=400)
+        
+        # Validate sections belong to exam
+        for section_id in {a['section'] for a in answers}:
+            if section_id not in section_questions:
+                return Response({
+                    "detail": f"Section {section_id} does not belong to this exam"
+                }, status=400)
+        
+        # Process each answer; rows are keyed by question so a repeated
+        # question keeps its last answer, and are written in one upsert
+        student_answers = {}
+        graded_at = timezone.now()
+        for a in answers:
+            section_id = a['section']
+            qid = a['question']
+            selected_option_id = a.get('selected_option')
+            essay_answer = (a.get('essay_answer') or '').strip()
+            
+            question = questions_map.get(qid)
+            
+            if not question:
+                return Response({"detail": f"Question {qid} not found"}, status=400)
+            
+            # Validate question belongs to section
+            if qid not in section_questions[section_id]:
+                return Response({
+                    "detail": f"Question {qid} does not belong to section {section_id}"
+                }, status=400)
+            
+            sa = StudentAnswer(
+                attempt=attempt,
+                question=question,
+                section_id=section_id,
+                selected_option_id=selected_option_id,
+                essay_answer=essay_answer if essay_answer else None
+            )
+            
+            # Auto-grade objective questions
+            if question.question_type == Question.OBJECTIVE:
+                if selected_option_id:
+                    if option_questions.get(selected_option_id) != question.id:
                         return Response({
-                            "detail": f"Question {qid} does not belong to section {section_id}"
+                            "detail": f"Option {selected_option_id} is invalid for question {qid}"
                         }, status=400)
                     
-                    # Create or update student answer
-                    sa, created = StudentAnswer.objects.get_or_create(
-                        attempt=attempt,
-                        question=question,
-                        defaults={'section': section}
+                    is_correct = selected_option_id == question.correct_option_id
+                    sa.mark_gained = question.maximum_mark if is_correct else 0
+                else:
+                    # No option selected = wrong answer
+                    sa.mark_gained = 0
+                
+                sa.graded_at = graded_at
+            else:
+                # Theory/OSCE - leave for examiner
+                sa.mark_gained = None
+            
+            student_answers[qid] = sa
+        
+        try:
+            with transaction.atomic():
+                # Validation above ran without a lock. Claiming the attempt is
+                # the first write: only one request can move it from
+                # IN_PROGRESS to SUBMITTING, and a crash rolls the claim back
+                claimed = ExamAttempt.objects.filter(pk=attempt.pk, status="IN_PROGRESS").update(status="SUBMITTING")
+                if not claimed:
+                    return Response({"detail": "Attempt was submitted by another request"}, status=409)
+                
+                # Insert new answers and overwrite existing ones in one statement
+                StudentAnswer.objects.bulk_create(
+                    list(student_answers.values()),
+                    update_conflicts=True,
+                    unique_fields=["attempt", "question"],
+                    update_fields=["section", "selected_option", "essay_answer", "mark_gained", "graded_by", "graded_at"],
+                )
+                
+                # Sum marks and count graded/pending answers per section in
+                # the database (one GROUP BY query)
+                section_rows = list(
+                    StudentAnswer.objects.filter(attempt=attempt)
+                    .values('section')
+                    .annotate(
+                        total=Sum('mark_gained'),
+                        graded=Count('id', filter=Q(mark_gained__isnull=False)),
+                        pending=Count('id', filter=Q(mark_gained__isnull=True)),
                     )
-                    sa.section = section
-                    sa.selected_option_id = selected_option_id
-                    sa.essay_answer = essay_answer if essay_answer else None
-                    
-                    # Auto-grade objective questions
-                    if question.question_type == Question.OBJECTIVE:
-                        if selected_option_id:
-                            try:
-                                opt = Option.objects.get(pk=selected_option_id, question=question)
-                            except Option.DoesNotExist:
-                                return Response({
-                                    "detail": f"Option {selected_option_id} is invalid for question {qid}"
-                                }, status=400)
-                            
-                            sa.mark_gained = question.maximum_mark if opt.is_correct else 0
-                        else:
-                            # No option selected = wrong answer
-                            sa.mark_gained = 0
-                        
-                        sa.graded_at = timezone.now()
-                        sa.graded_by = None
-                    else:
-                        # Theory/OSCE - leave for examiner
-                        sa.mark_gained = None
-                        sa.graded_at = None
-                        sa.graded_by = None
-                    
-                    sa.save()
+                )
+                section_totals = {row['section']: row['total'] for row in section_rows}
                 
                 # Calculate scores for ALL sections
-                for section in all_sections:
-                    section_total = StudentAnswer.objects.filter(
-                        attempt=attempt,
-                        section=section,
-                        mark_gained__isnull=False
-                    ).aggregate(total=Sum('mark_gained'))['total'] or 0
-                    
-                    SectionScore.objects.update_or_create(
-                        attempt=attempt,
-                        section=section,
-                        defaults={'score': section_total}
-                    )
+                section_scores = [
+                    SectionScore(attempt=attempt, section_id=section_id, score=section_totals.get(section_id) or 0)
+                    for section_id in section_questions
+                ]
+                
+                # Upsert all section scores in one statement
+                SectionScore.objects.bulk_create(
+                    section_scores,
+                    update_conflicts=True,
+                    unique_fields=["attempt", "section"],
+                    update_fields=["score"],
+                )
                 
                 # Calculate total score
-                total = StudentAnswer.objects.filter(
-                    attempt=attempt,
-                    mark_gained__isnull=False
-                ).aggregate(total=Sum('mark_gained'))['total'] or 0
+                total = sum(section_score.score for section_score in section_scores)
                 
                 # Update attempt
                 attempt.submitted_at = timezone.now()
                 attempt.status = "SUBMITTED"
                 attempt.total_score = total
-                attempt.save()
-                
-                graded_count = StudentAnswer.objects.filter(
-                    attempt=attempt,
-                    mark_gained__isnull=False
-                ).count()
-                
-                pending_count = StudentAnswer.objects.filter(
-                    attempt=attempt,
-                    mark_gained__isnull=True
-                ).count()
-                
-                return Response({
-                    "detail": "Exam submitted successfully",
-                    "attempt_id": attempt.id,
-                    "exam_id": attempt.exam_id,
-                    "exam_title": attempt.exam.title,
-                    "total_score": float(attempt.total_score),
-                    "graded_questions": graded_count,
-                    "pending_grading": pending_count
-                })
-                
-        except ExamAttempt.DoesNotExist:
-            return Response({"detail": "Attempt not found or already submitted"}, status=404)
+                attempt.refreshed_at = attempt.submitted_at
+                updated = ExamAttempt.objects.filter(pk=attempt.pk, status="SUBMITTING").update(
+                    status=attempt.status,
+                    submitted_at=attempt.submitted_at,
+                    total_score=attempt.total_score,
+                    refreshed_at=attempt.refreshed_at,
+                )
+                if not updated:
+                    # The claim was lost (status changed meanwhile), undo the writes
+                    transaction.set_rollback(True)
+                    return Response({"detail": "Attempt changed during submission"}, status=409)
         except Exception as e:
+            # The transaction, claim included, was rolled back; the student can submit again
             return Response({"detail": f"Submission failed: {str(e)}"}, status=500)
+        
+        graded_count = sum(row['graded'] for row in section_rows)
+        pending_count = sum(row['pending'] for row in section_rows)
+        
+        return Response({
+            "detail": "Exam submitted successfully",
+            "attempt_id": attempt.id,
+            "exam_id": attempt.exam_id,
+            "exam_title": attempt.exam.title,
+            "total_score": float(attempt.total_score),
+            "graded_questions": graded_count,
+            "pending_grading": pending_count
+        })
 
     @extend_schema(
         summary="Get student's exam attempts",
@@ -645,9 +909,10 @@ class StudentExamViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=["get"], url_path="my-attempts")
     def my_attempts(self, request):
         """Get all attempts for the current student"""
+        # the serializer only renders FK ids, answers are all it needs
         attempts = ExamAttempt.objects.filter(
             student=request.user
-        ).select_related('exam').order_by('-started_at')
+        ).prefetch_related('answers').order_by('-started_at')
         
         serializer = ExamAttemptSerializer(attempts, many=True, context={'request': request})
         return Response(serializer.data)
@@ -664,12 +929,9 @@ class StudentExamViewSet(viewsets.GenericViewSet):
     def get_attempt(self, request, pk=None, attempt_id=None):
         """Get details of a specific attempt"""
         try:
-            attempt = ExamAttempt.objects.select_related('exam', 'student').prefetch_related(
-                'answers__question',
-                'answers__selected_option',
-                'answers__section',
-                'section_scores__section'
-            ).get(pk=attempt_id, exam_id=pk, student=request.user)
+            attempt = ExamAttempt.objects.prefetch_related('answers').get(
+                pk=attempt_id, exam_id=pk, student=request.user
+            )
         except ExamAttempt.DoesNotExist:
             return Response({"detail": "Attempt not found"}, status=404)
         
@@ -691,7 +953,7 @@ class ExaminerViewSet(viewsets.GenericViewSet):
             return Response({"detail": "mark_gained is required"}, status=400)
         
         try:
-            sa = StudentAnswer.objects.select_related('attempt', 'section', 'question').get(pk=answer_id)
+            sa = StudentAnswer.objects.select_related('attempt', 'question').get(pk=answer_id)
         except StudentAnswer.DoesNotExist:
             return Response({"detail": "Answer not found"}, status=404)
         
@@ -705,39 +967,38 @@ class ExaminerViewSet(viewsets.GenericViewSet):
             sa.mark_gained = mark
             sa.graded_by = request.user
             sa.graded_at = timezone.now()
-            sa.save()
-
-            # Recalculate section score
-            section_total = StudentAnswer.objects.filter(
-                attempt=sa.attempt,
-                section=sa.section,
-                mark_gained__isnull=False
-            ).aggregate(total=Sum('mark_gained'))['total'] or 0
-            
-            SectionScore.objects.update_or_create(
-                attempt=sa.attempt,
-                section=sa.section,
-                defaults={'score': section_total}
+            StudentAnswer.objects.filter(pk=sa.pk).update(
+                mark_gained=sa.mark_gained, graded_by=sa.graded_by, graded_at=sa.graded_at
             )
 
-            # Recalculate attempt total
-            attempt_total = StudentAnswer.objects.filter(
-                attempt=sa.attempt,
-                mark_gained__isnull=False
-            ).aggregate(total=Sum('mark_gained'))['total'] or 0
+            # Section total, attempt total and ungraded count in one query
+            totals = StudentAnswer.objects.filter(attempt=sa.attempt_id).aggregate(
+                section_total=Sum('mark_gained', filter=Q(section=sa.section_id)),
+                attempt_total=Sum('mark_gained'),
+                ungraded=Count('id', filter=Q(mark_gained__isnull=True)),
+            )
+            section_total = totals['section_total'] or 0
             
-            sa.attempt.total_score = attempt_total
+            SectionScore.objects.bulk_create(
+                [SectionScore(attempt_id=sa.attempt_id, section_id=sa.section_id, score=section_total)],
+                update_conflicts=True,
+                unique_fields=["attempt", "section"],
+                update_fields=["score"],
+            )
+
+            sa.attempt.total_score = totals['attempt_total'] or 0
+            sa.attempt.refreshed_at = sa.graded_at
             
             # Check if all answers are graded
-            ungraded_count = StudentAnswer.objects.filter(
-                attempt=sa.attempt,
-                mark_gained__isnull=True
-            ).count()
-            
-            if ungraded_count == 0:
+            if totals['ungraded'] == 0:
                 sa.attempt.status = "GRADED"
             
-            sa.attempt.save()
+            # Write only the recomputed columns of the attempt
+            ExamAttempt.objects.filter(pk=sa.attempt_id).update(
+                total_score=sa.attempt.total_score,
+                refreshed_at=sa.attempt.refreshed_at,
+                status=sa.attempt.status,
+            )
 
         return Response({
             "detail": "Graded successfully",
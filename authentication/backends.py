@@ -0,0 +1,25 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+
+class LoginBackend(ModelBackend):
+    """
+    ModelBackend whose credential check only loads the columns a login
+    reads. get_user() is left as is, request.user needs the whole row.
+    """
+    login_fields = ("id", "username", "email", "password", "is_active")
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = User.objects.only(*self.login_fields).get(username=username)
+        except User.DoesNotExist:
+            # Hash anyway, as ModelBackend does, so unknown usernames take as long
+            User().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
@@ -0,0 +1,170 @@
+"""
+CSV user import shared by the bulk-upload-csv endpoint and the
+import_users management command.
+"""
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import User
+
+
+# Users inserted per bulk_create by the CSV upload
+CSV_UPLOAD_BATCH_SIZE = 1000
+CSV_UPLOAD_COLUMNS = (
+    "username", "first_name", "last_name", "email",
+    "is_student", "is_exam_manager", "is_examiner", "level",
+)
+CSV_TRUE_VALUES = frozenset(("1", "true", "t", "yes", "y"))
+
+
+def _csv_flag(value):
+    """Role column cell -> bool."""
+    return value.strip().lower() in CSV_TRUE_VALUES
+
+
+def import_users(file, upsert=False):
+    """
+    Parse a binary CSV file and create its users in batches, yielding one
+    {"row", "status", ...} result per data row as it is decided. Batches
+    commit as they go unless the caller wraps the run in a transaction.
+    """
+    # Decode rows as they are read instead of loading the whole upload
+    reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+    header = next(reader, [])
+    # Column positions are resolved once; missing columns point one past
+    # the header, at the padding cell every row is cut and padded to
+    width = len(header)
+    (
+        username_col, first_name_col, last_name_col, email_col,
+        is_student_col, is_exam_manager_col, is_examiner_col, level_col,
+    ) = (header.index(name) if name in header else width for name in CSV_UPLOAD_COLUMNS)
+    padding = [""] * (width + 1)
+    # upsert only rewrites the columns the file actually has, so e.g. a
+    # username-only roster resets passwords without blanking profiles
+    update_fields = (
+        "password", *(name for name in CSV_UPLOAD_COLUMNS[1:] if name in header), "updated_at"
+    )
+
+    batch = []  # (row number, unsaved user)
+    seen = set()
+    # blank lines are skipped, as csv.DictReader did
+    for i, row in enumerate(filter(None, reader), start=1):
+        # extra trailing cells would otherwise be read as missing columns
+        del row[width:]
+        row += padding[len(row):]
+        try:
+            username = row[username_col]
+            if not username:
+                raise ValueError("username required")
+            if username in seen:
+                raise ValueError(f"duplicate username {username} in file")
+            seen.add(username)
+
+            user = User(
+                username=username,
+                first_name=row[first_name_col],
+                last_name=row[last_name_col],
+                # blank emails are stored as NULL, "" would clash on the unique index
+                email=row[email_col] or None
+            )
+            # roles
+            user.is_student = _csv_flag(row[is_student_col])
+            user.is_exam_manager = _csv_flag(row[is_exam_manager_col])
+            user.is_examiner = _csv_flag(row[is_examiner_col])
+            lvl = row[level_col] or None
+            if lvl:
+                user.level = lvl
+            # password = username, hashed per batch in _save_user_batch
+            batch.append((i, user))
+        except Exception as ex:
+            yield {"row": i, "status": "error", "error": str(ex)}
+        if len(batch) >= CSV_UPLOAD_BATCH_SIZE:
+            # list(): a batch's results go out only after all its writes
+            # are committed, so no reported row can still roll back
+            yield from list(_save_user_batch(batch, upsert, update_fields))
+            batch = []
+    yield from list(_save_user_batch(batch, upsert, update_fields))
+
+
+def _save_user_batch(batch, upsert=False, update_fields=()):
+    """
+    Insert a batch of users with one bulk_create, yielding a result per
+    row. Usernames that are already taken are found with one SELECT and
+    reported up front, or with upsert have their update_fields rewritten;
+    staff and superuser accounts are never updated this way. Each write
+    commits on its own, or is a savepoint under the caller's transaction.
+    """
+    if not batch:
+        return
+    existing = {
+        username: (pk, is_staff or is_superuser)
+        for username, pk, is_staff, is_superuser in User.objects.filter(
+            username__in=[user.username for _, user in batch]
+        ).values_list("username", "id", "is_staff", "is_superuser")
+    }
+    to_update = []
+    for i, user in batch:
+        if user.username not in existing:
+            continue
+        pk, privileged = existing[user.username]
+        if upsert and privileged:
+            yield {"row": i, "status": "error", "error": f"username {user.username} is a staff account, not updated"}
+        elif upsert:
+            user.pk = pk
+            user.updated_at = timezone.now()
+            to_update.append((i, user))
+        else:
+            yield {"row": i, "status": "error", "error": f"username {user.username} already exists"}
+    batch = [(i, user) for i, user in batch if user.username not in existing]
+    if not batch and not to_update:
+        return
+    # Password = username. Hashing dominates the upload and releases the
+    # GIL, so the batch is hashed on a thread pool with one resolved hasher
+    hasher = get_hasher("default")
+    rows = batch + to_update
+    with ThreadPoolExecutor(max_workers=settings.CSV_HASH_WORKERS) as pool:
+        hashes = pool.map(
+            lambda raw: hasher.encode(raw, hasher.salt()), [user.username for _, user in rows]
+        )
+        for (_, user), password in zip(rows, hashes):
+            user.password = password
+    yield from _write_user_rows(
+        batch, "created", User.objects.bulk_create, lambda user: user.save()
+    )
+    yield from _write_user_rows(
+        to_update,
+        "updated",
+        lambda users: User.objects.bulk_update(users, update_fields),
+        lambda user: user.save(update_fields=update_fields),
+    )
+
+
+def _write_user_rows(rows, result_status, write_all, write_one):
+    """
+    Write the users with write_all() in one savepoint. If another row
+    still conflicts (e.g. on email), it is rolled back and the users are
+    written one by one with write_one() so the failing rows can be reported.
+    """
+    if not rows:
+        return
+    try:
+        with transaction.atomic():
+            write_all([user for _, user in rows])
+    except IntegrityError:
+        for i, user in rows:
+            try:
+                with transaction.atomic():
+                    write_one(user)
+            except IntegrityError as ex:
+                yield {"row": i, "status": "error", "error": str(ex)}
+            else:
+                yield {"row": i, "status": result_status, "username": user.username}
+    else:
+        for i, user in rows:
+            yield {"row": i, "status": result_status, "username": user.username}
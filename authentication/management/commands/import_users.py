@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.csv_import import import_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV roster, like the bulk-upload-csv endpoint, "
+        "without tying up a web worker on large files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with the bulk-upload-csv columns")
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update users whose username already exists instead of reporting them",
+        )
+
+    def handle(self, path, upsert, **options):
+        try:
+            file = open(path, "rb")
+        except OSError as ex:
+            raise CommandError(ex)
+
+        counts = {"created": 0, "updated": 0, "error": 0}
+        with file:
+            for result in import_users(file, upsert):
+                counts[result["status"]] += 1
+                if result["status"] == "error":
+                    self.stderr.write(f"row {result['row']}: {result['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            "created {created}, updated {updated}, errors {error}".format(**counts)
+        ))
@@ -3,6 +3,11 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
+def full_name(first_name, middle_name, last_name):
+    """The name parts joined with spaces, skipping blank ones; also used on values() rows."""
+    return " ".join(filter(None, (first_name, middle_name, last_name)))
+
+
 class UserManager(BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
         if not username:
@@ -75,11 +80,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.username
     
     def get_full_name(self):
-        parts = [self.first_name]
-        if getattr(self, "middle_name", ""):
-            parts.append(self.middle_name)
-        parts.append(self.last_name)
-        return " ".join(filter(None, parts))
+        return full_name(self.first_name, self.middle_name, self.last_name)
 
     
     def tokens(self):
@@ -89,6 +90,6 @@ class User(AbstractBaseUser, PermissionsMixin):
             'refresh': str(refresh),
             'user': {
                 'username': self.username,
-                'fullname': f"{self.first_name} {self.middle_name + ' ' if self.middle_name else ''}{self.last_name}".strip()
+                'fullname': self.get_full_name()
             }
         }
\ No newline at end of file
@@ -8,9 +8,11 @@ class IsAdmin(permissions.IsAdminUser):
 
 class IsExamManager(permissions.BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.is_exam_manager)
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_exam_manager)
 
 
 class IsExaminer(permissions.BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.is_examiner)
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_examiner)
@@ -1,3 +1,163 @@
-from django.test import TestCase
+import io
+import json
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .csv_import import import_users
+from .models import User
+
+
+HEADER = "username,first_name,last_name,email,is_student,is_exam_manager,is_examiner,level\n"
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersTests(TestCase):
+    def test_creates_users(self):
+        results = list(import_users(csv_file(
+            HEADER
+            + "ada,Ada,Obi,ada@example.com,yes,,,ND1\n"
+            + "\n"
+            + "bola,Bola,Eze,,0,1,t,\n"
+        )))
+
+        self.assertEqual(results, [
+            {"row": 1, "status": "created", "username": "ada"},
+            {"row": 2, "status": "created", "username": "bola"},
+        ])
+        ada = User.objects.get(username="ada")
+        self.assertEqual((ada.first_name, ada.last_name, ada.email, ada.level), ("Ada", "Obi", "ada@example.com", "ND1"))
+        self.assertTrue(ada.is_student)
+        self.assertFalse(ada.is_exam_manager or ada.is_examiner)
+        self.assertTrue(ada.check_password("ada"))
+        bola = User.objects.get(username="bola")
+        self.assertIsNone(bola.email)
+        self.assertIsNone(bola.level)
+        self.assertEqual((bola.is_student, bola.is_exam_manager, bola.is_examiner), (False, True, True))
+
+    def test_missing_columns_and_trailing_cells(self):
+        results = list(import_users(csv_file("first_name,username\nAda,ada,extra,cells\nBola\n")))
+
+        self.assertEqual(results, [
+            {"row": 2, "status": "error", "error": "username required"},
+            {"row": 1, "status": "created", "username": "ada"},
+        ])
+        ada = User.objects.get(username="ada")
+        self.assertEqual((ada.first_name, ada.last_name, ada.email), ("Ada", "", None))
+
+    def test_reports_duplicate_rows(self):
+        User.objects.create_user("taken", "pw")
+
+        results = list(import_users(csv_file(
+            HEADER
+            + "ada,Ada,Obi,,,,,\n"
+            + "ada,Ada,Again,,,,,\n"
+            + ",No,Name,,,,,\n"
+            + "taken,Old,User,,,,,\n"
+            + "chi,Chi,Uba,ada@example.com,,,,\n"
+            + "dayo,Dayo,Ade,ada@example.com,,,,\n"
+        )))
+
+        errors = {result["row"]: result["error"] for result in results if result["status"] == "error"}
+        self.assertEqual(sorted(errors), [2, 3, 4, 6])
+        self.assertIn("duplicate username ada", errors[2])
+        self.assertEqual(errors[3], "username required")
+        self.assertEqual(errors[4], "username taken already exists")
+        # the email clash fails the bulk insert, rows are then retried one by one
+        self.assertEqual(
+            [result["username"] for result in results if result["status"] == "created"], ["ada", "chi"]
+        )
+        self.assertEqual(User.objects.get(username="ada").last_name, "Obi")
+        self.assertFalse(User.objects.filter(username="dayo").exists())
+        self.assertFalse(User.objects.get(username="taken").check_password("taken"))
+
+    def test_upsert_updates_only_the_uploaded_columns(self):
+        User.objects.create_user(
+            "ada", "old", first_name="Ada", last_name="Obi", email="ada@example.com", is_student=True, level="ND1"
+        )
+
+        results = list(import_users(csv_file("username,level\nada,ND2\nbola,\n"), upsert=True))
+
+        self.assertEqual(results, [
+            {"row": 2, "status": "created", "username": "bola"},
+            {"row": 1, "status": "updated", "username": "ada"},
+        ])
+        ada = User.objects.get(username="ada")
+        self.assertEqual(ada.level, "ND2")
+        self.assertEqual((ada.first_name, ada.last_name, ada.email), ("Ada", "Obi", "ada@example.com"))
+        self.assertTrue(ada.is_student)
+        self.assertTrue(ada.check_password("ada"))
+
+    def test_upsert_skips_staff_accounts(self):
+        User.objects.create_user("admin", "secret", first_name="Ad", is_staff=True)
+        User.objects.create_superuser("root", "secret")
+
+        results = list(import_users(csv_file("username,first_name\nadmin,Changed\nroot,Changed\n"), upsert=True))
+
+        self.assertEqual([result["status"] for result in results], ["error", "error"])
+        self.assertIn("staff account", results[0]["error"])
+        for username in ("admin", "root"):
+            user = User.objects.get(username=username)
+            self.assertNotEqual(user.first_name, "Changed")
+            self.assertTrue(user.check_password("secret"))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BulkUploadCsvTests(TestCase):
+    url = "/api/auth/admin-users/bulk-upload-csv/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", "pw", first_name="Ad", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, text, query=""):
+        return self.client.post(
+            self.url + query, {"file": SimpleUploadedFile("users.csv", text.encode(), "text/csv")}, format="multipart"
+        )
+
+    def test_create(self):
+        response = self.upload(HEADER + "ada,Ada,Obi,,1,,,ND1\nada,Ada,Obi,,1,,,ND1\n")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], ["ada"])
+        self.assertEqual(response.data["errors"], [{"row": 2, "error": "duplicate username ada in file"}])
+        self.assertNotIn("updated", response.data)
+
+    def test_upsert(self):
+        User.objects.create_user("ada", "old", first_name="Ada", last_name="Obi")
+
+        response = self.upload("username,last_name\nada,Okafor\nbola,Eze\nadmin,X\n", "?mode=upsert")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], ["bola"])
+        self.assertEqual(response.data["updated"], ["ada"])
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3])
+        self.assertEqual(User.objects.get(username="ada").get_full_name(), "Ada Okafor")
+
+    def test_ndjson(self):
+        response = self.upload(HEADER + "ada,Ada,Obi,,,,,\n,,,,,,,\n", "?format=ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        response.close()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"row": 2, "status": "error", "error": "username required"},
+            {"row": 1, "status": "created", "username": "ada"},
+        ])
+
+    def test_missing_file(self):
+        response = self.client.post(self.url, {}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user("stu", "pw", is_student=True))
+        response = self.upload(HEADER + "ada,Ada,Obi,,,,,\n")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(User.objects.filter(username="ada").exists())
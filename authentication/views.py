@@ -1,13 +1,18 @@
 from django.shortcuts import render
 from .serializers import UserSerializer, CreateUserByAdminSerializer
 from authentication.permissions import IsAdmin, IsExamManager, IsExaminer
-from rest_framework.parsers import MultiPartParser, JSONParser, FormParser
-import csv, io
-from django.utils import timezone
+from rest_framework.parsers import MultiPartParser, JSONParser
+from collections.abc import Mapping
+from django.contrib.auth import authenticate
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from CBT_System.renderers import NDJSONRenderer
 from .models import User
+from .csv_import import import_users
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import LoginSerializer
 from rest_framework.generics import GenericAPIView
@@ -18,64 +23,99 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
     serializer_class = CreateUserByAdminSerializer
     queryset = User.objects.all()
-    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    # CRUD is JSON only; bulk_upload_csv takes the multipart file upload
+    parser_classes = (JSONParser,)
 
-    @action(detail=False, methods=["post"], url_path="bulk-upload-csv")
+    def get_queryset(self):
+        if self.action == "list":
+            # User has no relations to join; the list only loads the
+            # columns the serializer outputs (no password hash etc.)
+            fields = self.get_serializer_class().Meta.fields
+            return super().get_queryset().only(*(name for name in fields if name != "password"))
+        return super().get_queryset()
+
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[MultiPartParser],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer],
+        url_path="bulk-upload-csv",
+    )
     def bulk_upload_csv(self, request):
         """
         Expect CSV with columns: username, first_name, last_name, email, is_student, is_exam_manager, is_examiner, level
         Password will be set to username by default.
+        With ?mode=upsert, rows for existing usernames update the columns the
+        file has on those users (password reset to the username) instead of
+        being reported as errors; staff and superuser accounts are skipped.
+        With ?format=ndjson one line per row is streamed as each batch is saved.
         """
         file = request.FILES.get("file")
         if not file:
             return Response({"detail": "CSV file required in 'file' field."}, status=400)
 
-        data = file.read().decode("utf-8")
-        reader = csv.DictReader(io.StringIO(data))
+        upsert = request.query_params.get("mode") == "upsert"
+        results = import_users(file, upsert)
+        if request.accepted_renderer.format == "ndjson":
+            renderer = request.accepted_renderer
+            return StreamingHttpResponse(
+                (renderer.render(result) for result in results), content_type=renderer.media_type
+            )
+
         created = []
+        updated = []
         errors = []
-        for i, row in enumerate(reader, start=1):
-            try:
-                username = row.get("username")
-                if not username:
-                    raise ValueError("username required")
-
-                user = User(
-                    username=username,
-                    first_name=row.get("first_name", ""),
-                    last_name=row.get("last_name", ""),
-                    email=row.get("email", "")
-                )
-                # roles
-                user.is_student = row.get("is_student", "").strip().lower() in ("1", "true", "yes", "y")
-                user.is_exam_manager = row.get("is_exam_manager", "").strip().lower() in ("1", "true", "yes", "y")
-                user.is_examiner = row.get("is_examiner", "").strip().lower() in ("1", "true", "yes", "y")
-                lvl = row.get("level") or None
-                if lvl:
-                    user.level = lvl
-                user.set_password(username)  # password = username
-                user.save()
-                created.append(user.username)
-            except Exception as ex:
-                errors.append({"row": i, "error": str(ex)})
+        # The JSON response is only sent once everything is saved, so the
+        # whole upload shares one commit; failing rows are still reported
+        # rather than rolling it back. Streamed batches commit one by one.
+        with transaction.atomic():
+            for result in results:
+                if result["status"] == "created":
+                    created.append(result["username"])
+                elif result["status"] == "updated":
+                    updated.append(result["username"])
+                else:
+                    errors.append({"row": result["row"], "error": result["error"]})
+        errors.sort(key=lambda error: error["row"])
+        if upsert:
+            return Response({"created": created, "updated": updated, "errors": errors})
         return Response({"created": created, "errors": errors})
 
 
-
-
 class LoginView(GenericAPIView):
     permission_classes = []
     serializer_class = LoginSerializer
 
     def post(self, request):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data["user"]
+        # LoginSerializer documents the body; the two strings are read
+        # directly rather than running it on every login
+        if not isinstance(request.data, Mapping):
+            return Response(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    f"Invalid data. Expected a dictionary, but got {type(request.data).__name__}."
+                ]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        credentials = {
+            name: str(request.data.get(name) or "").strip() for name in ("username", "password")
+        }
+        missing = {name: ["This field is required."] for name, value in credentials.items() if not value}
+        if missing:
+            return Response(missing, status=status.HTTP_400_BAD_REQUEST)
+        user = authenticate(request, **credentials)
+        if not user:
+            return Response(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Invalid username or password"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         refresh = RefreshToken.for_user(user)
+        # access_token builds a new token on every access, read it once
+        access = refresh.access_token
 
+        # Plain dict on purpose: no serializer runs on the login path
         return Response({
             "refresh": str(refresh),
-            "access": str(refresh.access_token),
+            "access": str(access),
             "user": {
                 "id": user.id,
                 "username": user.username,